@@ -1,19 +1,88 @@
-import configparser
-import copy
+import codecs
+import contextlib
 import csv
+import datetime
+import functools
+import importlib.util
+import io
+import itertools
+import mmap
+import operator
 import os
+import re
+import stat
 import string
 import sys
-from typing import Dict, List, Tuple, Union
+import zipfile
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Sequence,
+                    Set, TextIO, Tuple, Union)
+from xml.etree import ElementTree
 
 # Values for data read and write parameters that will be used if not
 # defined in run time parameters.
-import openpyxl
-
 DEFAULT_CHARACTER_ENCODING = 'utf-8'
 DEFAULT_ENCODING_ERRORS = 'backslashreplace'
 
+# Size of the buffer used when reading and writing the data files.
+IO_BUFFER_SIZE = 1 << 20
+# Number of rows collected before they are written to the output file.
+WRITE_CHUNK_ROWS = 10000
+
+# XML namespaces and element tags used by the parts of an Excel spreadsheet
+# that are read directly from the xlsx zip archive.
+XLSX_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = ('{http://schemas.openxmlformats.org/officeDocument/2006/'
+               'relationships}')
+XLSX_PKG_REL_NS = ('{http://schemas.openxmlformats.org/package/2006/'
+                   'relationships}')
+XLSX_CELL_TAG = f'{XLSX_MAIN_NS}c'
+XLSX_DIMENSION_TAG = f'{XLSX_MAIN_NS}dimension'
+XLSX_ROW_TAG = f'{XLSX_MAIN_NS}row'
+XLSX_SHEET_DATA_TAG = f'{XLSX_MAIN_NS}sheetData'
+XLSX_TEXT_TAG = f'{XLSX_MAIN_NS}t'
+XLSX_VALUE_TAG = f'{XLSX_MAIN_NS}v'
+# Number formats built into Excel that display a cell value as a date or time.
+XLSX_DATE_FORMAT_IDS = frozenset(list(range(14, 23)) + list(range(45, 48)))
+# Built in number format that displays a cell value as elapsed time.
+XLSX_TIMEDELTA_FORMAT_IDS = frozenset([46])
+# Date serial numbers are counted from one of these two epochs.
+XLSX_WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+XLSX_MAC_EPOCH = datetime.datetime(1904, 1, 1)
+
+# Results of _read_config for configuration files that were valid, keyed by
+# (path, modification time, size) so a changed file is read again.
+_CONFIG_CACHE: Dict[Tuple[str, int, int],
+                    Tuple[bool, Union[str, None], Dict]] = {}
+
+
+def _calamine_value_to_str(value: Any) -> str:
+    """
+    Convert a cell value returned by python-calamine to the string openpyxl
+    would have given.
+
+    Notes:
+        calamine returns every number as a float.  Whole numbers are only
+        turned back into ints below 1e16, larger ones are stored by Excel
+        with an exponent and openpyxl returns them as floats too.
+
+        Dates before the epoch of the workbook, like a date before 1904 in
+        a date1904 workbook, can't be matched.  calamine returns them as
+        midnight with no date while openpyxl counts back from the epoch.
 
+    :param value:
+        The cell value, empty cells are empty strings.
+    :return:
+        The value formatted the way csv.writer formats the openpyxl value.
+    """
+    if isinstance(value, float) and value.is_integer() and \
+            (abs(value) < 1e16):
+        value = int(value)
+    elif type(value) is datetime.date:
+        value = datetime.datetime.combine(value, datetime.time())
+    return str(value)
+
+
+@functools.lru_cache(maxsize=None)
 def _column_to_index(column: str) -> int:
     """
     Convert a spreadsheet column letter to a numeric index.
@@ -25,9 +94,11 @@ def _column_to_index(column: str) -> int:
         index number returned is 0 based because I want to use it to pull
         from a 0 based list.
 
-        It is assumed that the column str is composed of ASCII letters.
-        If that is not the case, the behavior is not defined.
-        So don't send something bizarre like a smiley face.
+        The column str must be composed of ASCII letters only.  Anything
+        else, like a smiley face, is rejected with a ValueError.
+
+        The results are cached since the same handful of columns get
+        converted over and over.
 
     :param column:
         The string representation of the columns like
@@ -35,11 +106,16 @@ def _column_to_index(column: str) -> int:
     :return:
         A number that will correspond to the array index of a column letter
         where 'A' -> 0, 'B' -> 1 and so forth.
+    :raise ValueError:
+        If column is empty or contains anything other than ASCII letters.
     """
+    if not (column.isascii() and column.isalpha()):
+        raise ValueError(f'column ({column}) is not made of ASCII letters')
+
     num = 0
-    for col_letter in column:
-        if col_letter in string.ascii_letters:
-            num = (num * 26) + (ord(col_letter.upper()) - ord('A')) + 1
+    # 'A' is 65 in ASCII, so subtracting 64 gives 'A' -> 1 ... 'Z' -> 26.
+    for col_byte in column.upper().encode('ascii'):
+        num = (num * 26) + (col_byte - 64)
     return num - 1
 
 
@@ -71,27 +147,38 @@ def _calculate_output_indexes(in_headers: List[str],
             2 - list of translated values.  This may not contain entries for
                 all provided values since some may fail.  If any fail the
                 whole translation will be considered a failure but what could
-                be translated will be returned.
+                be translated will be returned.  When column_indexes is used
+                this is the list from params, it must not be modified.
     """
     cof = None
     out_indexes = []
 
     if ('column_indexes' in params) and (len(params['column_indexes']) > 0):
         success = True
-        out_indexes = copy.copy(params['column_indexes'])
+        out_indexes = params['column_indexes']
     elif ('column_letters' in params) and (len(params['column_letters']) > 0):
+        invalid_letters = []
         for column in params['column_letters']:
-            out_indexes.append(_column_to_index(column))
-        success = True
+            try:
+                out_indexes.append(_column_to_index(column))
+            except ValueError:
+                invalid_letters.append(column)
+        if len(invalid_letters) == 0:
+            success = True
+        else:
+            success = False
+            cof = (f'some column letters {invalid_letters} are not made of '
+                   f'ASCII letters')
     elif ('column_headers' in params) and (len(params['column_headers']) > 0):
         if in_headers is not None:
+            # If a header is repeated the first column with it is used.
+            header_to_index = {}
+            for in_index, in_header in enumerate(in_headers):
+                header_to_index.setdefault(in_header, in_index)
+
             unmatched_headers = []
             for out_header in params['column_headers']:
-                out_index = None
-                for in_index, in_header in enumerate(in_headers):
-                    if out_header == in_header:
-                        out_index = in_index
-                        break
+                out_index = header_to_index.get(out_header)
                 if out_index is not None:
                     out_indexes.append(out_index)
                 else:
@@ -112,12 +199,99 @@ def _calculate_output_indexes(in_headers: List[str],
     return success, cof, out_indexes
 
 
+def _parse_ini(config_text: str) -> Tuple[bool,
+                                          Union[str, None],
+                                          Dict[str, Dict[str, str]]]:
+    """
+    Split the text of an INI style configuration file in to sections and
+    options.
+
+    Notes:
+        Only the parts of the INI format that the configuration for this
+        script uses are handled, it is a lot quicker than configparser.
+            - Lines starting with # or ; are comments.
+            - Option names are not case sensitive and are separated from
+              the value by the first = or :.
+            - An option value can continue on following lines as long as they
+              are indented more than the option name.  The lines are joined
+              with newlines.
+            - There is no interpolation of values.
+
+    :param config_text:
+        The full contents of the configuration file.
+    :return:
+        A tuple containing the following elements:
+            0 - flag to indicate if the text could be parsed
+            1 - string describing the line that couldn't be parsed
+            2 - dictionary of sections, each being a dictionary of option
+                names to their values
+    """
+    sections = {}
+    section = None
+    option_lines = None
+    option_indent = 0
+
+    for line_num, line in enumerate(config_text.splitlines(), start=1):
+        stripped = line.strip()
+        if stripped.startswith(('#', ';')):
+            continue
+
+        indent = len(line) - len(line.lstrip())
+        if (option_lines is not None) and \
+                ((not stripped) or (indent > option_indent)):
+            option_lines.append(stripped)
+            continue
+        if not stripped:
+            continue
+
+        if stripped.startswith('[') and stripped.endswith(']'):
+            name = stripped[1:-1]
+            if name in sections:
+                return False, \
+                       f'section {name} repeated on line {line_num}', \
+                       sections
+            section = sections[name] = {}
+            option_lines = None
+            continue
+
+        if section is None:
+            return False, \
+                   f'option outside of a section on line {line_num}', \
+                   sections
+        delimiters = [stripped.index(delim) for delim in '=:'
+                      if delim in stripped]
+        if not delimiters:
+            return False, \
+                   f'option without a value on line {line_num}', \
+                   sections
+        key = stripped[:min(delimiters)].strip().lower()
+        if key in section:
+            return False, \
+                   f'option {key} repeated on line {line_num}', \
+                   sections
+        option_lines = [stripped[min(delimiters) + 1:].strip()]
+        option_indent = indent
+        section[key] = option_lines
+
+    for options in sections.values():
+        for key, lines in options.items():
+            options[key] = '\n'.join(lines).rstrip()
+    return True, None, sections
+
+
 def _read_config(config_path: str) -> Tuple[bool,
                                             Union[str, None],
                                             Union[dict, None]]:
     """
     Verify that config_path is a valid file and read its contents into a
-    ConfigParser object.
+    dictionary of configuration sections.
+
+    Notes:
+        A valid configuration is cached and reused until the file's
+        modification time or size changes.  Invalid configurations are
+        always read again so a fixed file is picked up straight away.  The
+        cached dictionary is shared between callers and must not be
+        modified.
 
     :param config_path:
         Path to file containing the configuration parameters for this script.
@@ -133,11 +307,17 @@ def _read_config(config_path: str) -> Tuple[bool,
     """
     cof = None
 
+    # The same stat result is used to check the file and as the cache key.
+    config_stat = None
+    if config_path is not None:
+        config_stat = _stat_or_none(config_path)
+
     config_path_good = True
     if config_path is None:
         config_path_good = False
         cof = 'configuration file must be provided'
-    elif ((not os.path.isfile(config_path)) or
+    elif ((config_stat is None) or
+          (not stat.S_ISREG(config_stat.st_mode)) or
           (not os.access(config_path, os.R_OK))):
         config_path_good = False
         cof = f'configuration file ({config_path}) must be a readable file'
@@ -145,100 +325,865 @@ def _read_config(config_path: str) -> Tuple[bool,
     if not config_path_good:
         return config_path_good, cof, None
 
-    config_parser = configparser.ConfigParser()
+    cache_key = (config_path, config_stat.st_mtime_ns, config_stat.st_size)
+    if cache_key in _CONFIG_CACHE:
+        return _CONFIG_CACHE[cache_key]
+
     try:
         with open(config_path,
                   'r',
                   encoding=DEFAULT_CHARACTER_ENCODING,
                   errors=DEFAULT_ENCODING_ERRORS) as config_fh:
-            config_parser.read_file(config_fh)
-    except IOError as exc:
+            config_text = config_fh.read()
+    except OSError as exc:
         return False, \
                f'failed to read configuration file ({config_path}): {exc}', \
                None
 
-    return _validate_config(config_parser)
+    parsed, err_parse, config_raw = _parse_ini(config_text)
+    if not parsed:
+        return False, \
+               f'failed to parse configuration file ({config_path}): ' \
+               f'{err_parse}', \
+               None
+
+    config_result = _validate_config(config_raw)
+    if config_result[0]:
+        _CONFIG_CACHE[cache_key] = config_result
+    return config_result
 
 
-def _read_csv_data(params: dict) -> List[List[str]]:
+def _make_projector(indexes: Sequence[int]) -> Callable[[List], Tuple]:
     """
-    Read the rows of data in the CSV data file defined in params.
+    Create a function that picks the values at indexes out of a data row.
+
+    Notes:
+        operator.itemgetter does the work in C but returns a bare value
+        instead of a tuple when it is given a single index, so that case is
+        wrapped to always return a tuple.
+
+        A lambda generated with the indexes written in as constants, like
+        lambda r: (r[5], r[3], r[1], r[2]), was tried as well.  It ran no
+        faster than itemgetter on CPython 3.11 so it isn't worth the eval.
+
+    :param indexes:
+        The indexes of the values to pick in the order they should be
+        returned.
+    :return:
+        A function that takes a data row and returns a tuple of the values
+        at indexes.
+    """
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda row: (row[index],)
+    return operator.itemgetter(*indexes)
+
+
+def _open_csv_reader(params: dict) -> Tuple[TextIO, Iterator[List[str]]]:
+    """
+    Open the CSV data file defined in params for reading.
 
     :param params:
         Collection of runtime parameters provided by the caller that have
         been verified and translated to a dictionary.
     :return:
-        A list of the data rows in the input data file in the order that
-        they appear in the original data file.
+        A tuple containing the following elements:
+            0 - the open input file, the caller is responsible for closing it
+            1 - CSV reader that will return the data rows in the input file
+                one at a time in the order that they appear in the file
     :raise RuntimeError:
-        If there is a problem opening or reading the input file specified
-        in params as a CSV data file this exception will be raised.
+        If there is a problem opening the input file specified in params as
+        a CSV data file this exception will be raised.
     """
-    data_rows = []
+    input_file_path = params['input_file_path']
+    encoding = params['character_encoding']
+    encoding_errors = params['character_encoding_errors']
     try:
-        with open(params['input_file_path'],
-                  'r',
-                  encoding=params['character_encoding'],
-                  errors=params['character_encoding_errors']) as in_fh:
-            csv_reader = csv.reader(in_fh,
-                                    delimiter=',',
-                                    quotechar='"')
-            for row in csv_reader:
-                data_rows.append(row)
-    except IOError as ioe:
+        in_fh = open(input_file_path,
+                     'r',
+                     buffering=IO_BUFFER_SIZE,
+                     encoding=encoding,
+                     errors=encoding_errors,
+                     newline='')
+    except OSError as exc:
         raise RuntimeError(f'failed to read lines from input data file '
-                           f'({params["input_file_path"]}): {ioe}')
+                           f'({input_file_path}): {exc}')
+
+    csv_reader = csv.reader(in_fh,
+                            delimiter=',',
+                            quotechar='"')
+    return in_fh, csv_reader
+
+
+def _decode_xlsx_cell(cell: ElementTree.Element,
+                      shared_strings: List[str],
+                      date_styles: Set[int],
+                      timedelta_styles: Set[int],
+                      epoch: datetime.datetime) -> Union[str,
+                                                         int,
+                                                         float,
+                                                         bool,
+                                                         datetime.datetime,
+                                                         datetime.time,
+                                                         datetime.timedelta,
+                                                         None]:
+    """
+    Translate a single cell element from a worksheet into a python value.
+
+    Notes:
+        The values match the ones openpyxl returns for a workbook loaded with
+        data_only set so the output doesn't change with the reader used.
+
+    :param cell:
+        The <c> element from the worksheet XML.
+    :param shared_strings:
+        The shared string table of the workbook that string cells refer to.
+    :param date_styles:
+        The style indexes that display a number as a date or time.
+    :param timedelta_styles:
+        The style indexes that display a number as elapsed time.
+    :param epoch:
+        The date that serial date numbers in the workbook are counted from.
+    :return:
+        The value of the cell or None if the cell is empty.
+    """
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter(XLSX_TEXT_TAG))
+
+    # A formula with no cached result has an empty <v/>.
+    value = cell.findtext(XLSX_VALUE_TAG)
+    if not value:
+        return None
+    if cell_type == 's':
+        return shared_strings[int(value)]
+    if cell_type == 'b':
+        return value == '1'
+    if cell_type == 'd':
+        return datetime.datetime.fromisoformat(value)
+    if cell_type in ('str', 'e'):
+        return value
+
+    if ('.' in value) or ('E' in value) or ('e' in value):
+        number = float(value)
+    else:
+        number = int(value)
+    style = int(cell.get('s', '0'))
+    if style in date_styles:
+        if style in timedelta_styles:
+            return _excel_serial_to_timedelta(number)
+        return _excel_serial_to_datetime(number, epoch)
+    return number
+
+
+def _decode_xlsx_row(row_elem: ElementTree.Element,
+                     row: List[str],
+                     output_positions: Union[Dict[int, List[int]], None],
+                     shared_strings: List[str],
+                     date_styles: Set[int],
+                     timedelta_styles: Set[int],
+                     epoch: datetime.datetime) -> None:
+    """
+    Decode the cells in a row element from a worksheet into row.
+
+    :param row_elem:
+        The <row> element from the worksheet XML.
+    :param row:
+        The list the cell values are stored in as strings.  It is extended
+        as needed when output_positions is None.
+    :param output_positions:
+        Map of the column index of each cell that should be decoded to the
+        positions its value is stored at in row.  If None every cell is
+        decoded and stored at its column index.
+    :param shared_strings:
+        The shared string table of the workbook that string cells refer to.
+    :param date_styles:
+        The style indexes that display a number as a date or time.
+    :param timedelta_styles:
+        The style indexes that display a number as elapsed time.
+    :param epoch:
+        The date that serial date numbers in the workbook are counted from.
+    """
+    col_index = -1
+    for cell in row_elem.iterfind(XLSX_CELL_TAG):
+        ref = cell.get('r')
+        if ref is None:
+            col_index += 1
+        else:
+            col_index = _column_to_index(ref.rstrip(string.digits))
+
+        if output_positions is None:
+            if col_index >= len(row):
+                row.extend([''] * (col_index + 1 - len(row)))
+            positions = (col_index,)
+        else:
+            positions = output_positions.get(col_index)
+            if positions is None:
+                continue
+
+        value = _decode_xlsx_cell(cell,
+                                  shared_strings,
+                                  date_styles,
+                                  timedelta_styles,
+                                  epoch)
+        if value is not None:
+            value = str(value)
+            for position in positions:
+                row[position] = value
+
+
+def _excel_serial_to_datetime(serial: Union[int, float],
+                              epoch: datetime.datetime) -> \
+        Union[datetime.datetime, datetime.time]:
+    """
+    Convert an Excel serial date number to a datetime.
+
+    Notes:
+        Follows the conversion openpyxl uses.  That includes the phantom
+        29 Feb 1900 Excel inherited from Lotus 1-2-3 and returning a time
+        instead of a datetime for values with no day part.
+
+    :param serial:
+        The number of days, and fraction of a day, since epoch.
+    :param epoch:
+        The date the workbook counts days from.
+    :return:
+        The date and time the serial number represents.
+    """
+    day, fraction = divmod(serial, 1)
+    diff = datetime.timedelta(milliseconds=round(fraction * 86400 * 1000))
+    if (0 <= serial < 1) and (diff.days == 0):
+        return (datetime.datetime.min + diff).time()
+    if (0 < serial < 60) and (epoch == XLSX_WINDOWS_EPOCH):
+        day += 1
+    return epoch + datetime.timedelta(days=day) + diff
+
+
+def _excel_serial_to_timedelta(serial: Union[int, float]) -> \
+        datetime.timedelta:
+    """
+    Convert an Excel serial number shown as elapsed time to a timedelta.
+
+    Notes:
+        Follows the conversion openpyxl uses, rounded to the millisecond.
+
+    :param serial:
+        The number of days, and fraction of a day, that have elapsed.
+    :return:
+        The elapsed time the serial number represents.
+    """
+    diff = datetime.timedelta(days=serial)
+    if diff.microseconds:
+        diff = datetime.timedelta(seconds=diff.total_seconds() // 1,
+                                  microseconds=round(diff.microseconds, -3))
+    return diff
+
+
+def _find_output_columns(in_headers: List[str],
+                         params: dict) -> Tuple[Tuple[int, ...], List[str]]:
+    """
+    Work out which columns of the input are written and the header row that
+    is written for them.
+
+    :param in_headers:
+        The first row of the input data file.
+    :param params:
+        Collection of runtime parameters provided by the caller that have
+        been verified and translated to a dictionary.
+    :return:
+        A tuple containing the following elements:
+            0 - the indexes of the input columns in the order they are
+                written
+            1 - the header row of the output file
+    :raise RuntimeError:
+        If the configured columns can't be found in the input or the
+        output headers don't match them.
+    """
+    valid_indexes, err_indexes, output_indexes = _calculate_output_indexes(
+        in_headers=in_headers,
+        params=params)
+    if not valid_indexes:
+        raise RuntimeError(f'failed to translate data_columns to data '
+                           f'index numbers: {err_indexes}')
+    output_indexes = tuple(output_indexes)
+
+    if 'output_headers' in params:
+        out_headers = params['output_headers']
+        if len(out_headers) != len(output_indexes):
+            raise RuntimeError(f'{len(out_headers)} output_headers '
+                               f'defined for {len(output_indexes)} '
+                               f'output columns')
+    else:
+        out_headers = [in_headers[index] for index in output_indexes]
+    return output_indexes, out_headers
+
+
+def _find_output_indexes(in_headers: List[str],
+                         params: dict) -> Union[Tuple[int, ...], None]:
+    """
+    Work out which columns of a spreadsheet need to be decoded.
+
+    :param in_headers:
+        The first row of the spreadsheet.
+    :param params:
+        Collection of runtime parameters for the script that will be searched
+        for valid column definitions.
+    :return:
+        The indexes of the columns that will be written, in the order they
+        will be written, or None if they can't be determined.
+    """
+    valid_indexes, _, output_indexes = _calculate_output_indexes(
+        in_headers=in_headers,
+        params=params)
+    if valid_indexes and (len(output_indexes) > 0):
+        return tuple(output_indexes)
+    return None
+
+
+def _is_date_format(format_code: str) -> bool:
+    """
+    Check if an Excel number format code will display a number as a date or
+    time.
+
+    :param format_code:
+        The format code from the numFmt element of the workbook styles.
+    :return:
+        True if the format includes day, month, year, hour, or second codes.
+    """
+    format_code = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', '', format_code)
+    return any(code in format_code.lower() for code in 'dmyhs')
+
+
+def _is_timedelta_format(format_code: str) -> bool:
+    """
+    Check if an Excel number format code will display a number as elapsed
+    time, like [h]:mm:ss, instead of a time of day.
+
+    :param format_code:
+        The format code from the numFmt element of the workbook styles.
+    :return:
+        True if the first section of the format starts with an hour, minute
+        or second code in square brackets.
+    """
+    return re.match(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|'
+                    r'\[ss?\](\.0*)?',
+                    format_code.split(';')[0],
+                    re.IGNORECASE) is not None
 
-    return data_rows
+
+def _read_xlsx_date_styles(xlsx_zip: zipfile.ZipFile) -> Tuple[Set[int],
+                                                              Set[int]]:
+    """
+    Find the cell styles in the workbook that display numbers as dates.
+
+    :param xlsx_zip:
+        The open xlsx archive.
+    :return:
+        A tuple containing the following elements:
+            0 - the indexes of the cell styles (the s attribute of a cell)
+                that use a date or time number format
+            1 - the indexes of the cell styles out of those that show
+                elapsed time
+    """
+    try:
+        styles = ElementTree.fromstring(xlsx_zip.read('xl/styles.xml'))
+    except KeyError:
+        return set(), set()
+
+    date_formats = set(XLSX_DATE_FORMAT_IDS)
+    timedelta_formats = set(XLSX_TIMEDELTA_FORMAT_IDS)
+    for num_fmt in styles.iterfind(f'{XLSX_MAIN_NS}numFmts/'
+                                   f'{XLSX_MAIN_NS}numFmt'):
+        format_code = num_fmt.get('formatCode', '')
+        if _is_date_format(format_code):
+            date_formats.add(int(num_fmt.get('numFmtId')))
+            if _is_timedelta_format(format_code):
+                timedelta_formats.add(int(num_fmt.get('numFmtId')))
+
+    date_styles = set()
+    timedelta_styles = set()
+    for style_index, xf in enumerate(styles.iterfind(f'{XLSX_MAIN_NS}cellXfs/'
+                                                     f'{XLSX_MAIN_NS}xf')):
+        num_fmt_id = int(xf.get('numFmtId', '0'))
+        if num_fmt_id in date_formats:
+            date_styles.add(style_index)
+            if num_fmt_id in timedelta_formats:
+                timedelta_styles.add(style_index)
+    return date_styles, timedelta_styles
+
+
+def _read_xlsx_shared_strings(xlsx_zip: zipfile.ZipFile,
+                              strings_part: Union[str, None]) -> List[str]:
+    """
+    Read the table of strings that string cells in the workbook refer to.
+
+    :param xlsx_zip:
+        The open xlsx archive.
+    :param strings_part:
+        Name of the archive member holding the shared strings or None if
+        the workbook has none.
+    :return:
+        The shared strings in the order they are indexed by the cells.
+    """
+    shared_strings = []
+    if strings_part is None:
+        return shared_strings
+    try:
+        strings_fh = xlsx_zip.open(strings_part)
+    except KeyError:
+        return shared_strings
+
+    sst = None
+    with strings_fh:
+        for event, elem in ElementTree.iterparse(strings_fh,
+                                                 events=('start', 'end')):
+            if event == 'start':
+                if sst is None:
+                    sst = elem
+                continue
+            if elem.tag != f'{XLSX_MAIN_NS}si':
+                continue
+            text = elem.findtext(XLSX_TEXT_TAG)
+            if text is None:
+                # Rich text is split in runs that each have their own text.
+                text = ''.join(run.findtext(XLSX_TEXT_TAG) or ''
+                               for run in elem.iterfind(f'{XLSX_MAIN_NS}r'))
+            shared_strings.append(text)
+            # Like the sheet rows, the string is removed from <sst> so the
+            # emptied elements don't pile up.
+            sst.clear()
+    return shared_strings
 
 
-def _read_xlsx_data(params: dict) -> List[List[str]]:
+def _read_xlsx_workbook(xlsx_zip: zipfile.ZipFile,
+                        sheet_name: str) -> Tuple[Union[str, None],
+                                                  Union[str, None],
+                                                  datetime.datetime]:
+    """
+    Locate the worksheet named sheet_name and the shared strings in the xlsx
+    archive.
+
+    :param xlsx_zip:
+        The open xlsx archive.
+    :param sheet_name:
+        The name of the sheet as it appears on the tab in Excel.
+    :return:
+        A tuple containing the following elements:
+            0 - name of the archive member holding the worksheet or None if
+                the workbook has no sheet named sheet_name
+            1 - name of the archive member holding the shared strings or
+                None if the workbook has none
+            2 - the date that serial date numbers in the workbook are counted
+                from
+    :raise KeyError:
+        If the workbook or its relationships aren't where they are expected
+        in the archive.
+    """
+    workbook = ElementTree.fromstring(xlsx_zip.read('xl/workbook.xml'))
+    workbook_pr = workbook.find(f'{XLSX_MAIN_NS}workbookPr')
+    if ((workbook_pr is not None) and
+            (workbook_pr.get('date1904', 'false').lower() in ('1', 'true'))):
+        epoch = XLSX_MAC_EPOCH
+    else:
+        epoch = XLSX_WINDOWS_EPOCH
+
+    rel_id = None
+    for sheet in workbook.iterfind(f'{XLSX_MAIN_NS}sheets/'
+                                   f'{XLSX_MAIN_NS}sheet'):
+        if sheet.get('name') == sheet_name:
+            rel_id = sheet.get(f'{XLSX_REL_NS}id')
+            break
+    if rel_id is None:
+        return None, None, epoch
+
+    sheet_part = None
+    strings_part = None
+    rels = ElementTree.fromstring(
+        xlsx_zip.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iterfind(f'{XLSX_PKG_REL_NS}Relationship'):
+        target = rel.get('Target')
+        part = target[1:] if target.startswith('/') else f'xl/{target}'
+        if rel.get('Id') == rel_id:
+            sheet_part = part
+        elif rel.get('Type', '').endswith('/sharedStrings'):
+            strings_part = part
+    if sheet_part is None:
+        raise KeyError(f'relationship {rel_id} for sheet {sheet_name}')
+    return sheet_part, strings_part, epoch
+
+
+def _read_xlsx_data(params: dict) -> Iterator[List]:
     """
     Read the rows of data in the Excel spreadsheet defined in params.
 
+    Notes:
+        The worksheet XML is streamed straight out of the xlsx archive and
+        each row is yielded as soon as it is decoded.  The first row is
+        read in full so the column headers can be matched.  After that only
+        the cells in the columns that will be written are decoded and each
+        row only holds those values, there is no space kept for the columns
+        that are dropped.
+
+        Values are converted to strings the same way csv.writer would, so
+        rows can be written without checking the type of every value.
+
+        If python-calamine is installed it is used to read the sheet
+        instead, it parses the workbook in native code.
+
+    :param params:
+        Collection of runtime parameters provided by the caller that have
+        been verified and translated to a dictionary.
+    :return:
+        The header row of the input data file in full, followed by the data
+        rows holding just the output columns in output order.  Rows are
+        yielded one at a time in the order that they appear in the original
+        data file.
+    :raise RuntimeError:
+        If there is a problem opening or reading the input file specified
+        in params as an Excel spreadsheet this exception will be raised.
+    """
+    input_file_path = params['input_file_path']
+    sheet_name = params['input_sheet_name']
+    if importlib.util.find_spec('python_calamine') is not None:
+        yield from _read_xlsx_data_calamine(params)
+        return
+
+    try:
+        xlsx_zip = zipfile.ZipFile(input_file_path)
+    except (OSError, zipfile.BadZipFile) as exc:
+        raise RuntimeError(f'failed to read lines from input data file '
+                           f'({input_file_path}): {exc}')
+
+    with xlsx_zip:
+        try:
+            sheet_part, strings_part, epoch = _read_xlsx_workbook(
+                xlsx_zip, sheet_name)
+            shared_strings = _read_xlsx_shared_strings(xlsx_zip, strings_part)
+            date_styles, timedelta_styles = _read_xlsx_date_styles(xlsx_zip)
+        except KeyError:
+            # Not laid out the way Excel writes a workbook, let openpyxl
+            # work out where the sheet is.
+            yield from _read_xlsx_data_openpyxl(params)
+            return
+        except (ValueError, ElementTree.ParseError) as exc:
+            raise RuntimeError(f'failed to read lines from input data file '
+                               f'({input_file_path}): {exc}')
+        if sheet_part is None:
+            raise RuntimeError(f'no sheet named ({sheet_name}) is contained '
+                               f'in input data file ({input_file_path})')
+
+        output_positions = None
+        row_width = 0
+        next_row_num = 1
+        sheet_data = None
+        # A malformed sheet, cell reference or shared string index is
+        # reported like any other read failure.  The try is outside the row
+        # loop.
+        try:
+            with xlsx_zip.open(sheet_part) as sheet_fh:
+                for event, elem in ElementTree.iterparse(
+                        sheet_fh, events=('start', 'end')):
+                    if event == 'start':
+                        if elem.tag == XLSX_SHEET_DATA_TAG:
+                            sheet_data = elem
+                        continue
+                    if elem.tag == XLSX_DIMENSION_TAG:
+                        # Until the columns to keep are known rows are padded
+                        # to the full width of the sheet, like openpyxl does.
+                        last_cell = elem.get('ref', 'A1').split(':')[-1]
+                        row_width = _column_to_index(
+                            last_cell.rstrip(string.digits)) + 1
+                        continue
+                    if elem.tag != XLSX_ROW_TAG:
+                        continue
+
+                    # Rows without any cells aren't stored in the sheet, an
+                    # empty row is yielded for each of them.
+                    row_num = int(elem.get('r', next_row_num))
+                    while next_row_num <= row_num:
+                        row = [''] * row_width
+                        if next_row_num == row_num:
+                            _decode_xlsx_row(elem,
+                                             row,
+                                             output_positions,
+                                             shared_strings,
+                                             date_styles,
+                                             timedelta_styles,
+                                             epoch)
+                        next_row_num += 1
+                        yield row
+
+                        if output_positions is None:
+                            output_indexes = _find_output_indexes(row, params)
+                            if output_indexes is not None:
+                                # A column can be written more than once.
+                                output_positions = {}
+                                for position, in_index in enumerate(
+                                        output_indexes):
+                                    output_positions.setdefault(
+                                        in_index, []).append(position)
+                                row_width = len(output_indexes)
+
+                    # Clearing the row isn't enough, the empty element would
+                    # stay in sheetData and memory would grow with every row.
+                    if sheet_data is not None:
+                        sheet_data.clear()
+                    else:
+                        elem.clear()
+        except (ValueError, IndexError, ElementTree.ParseError) as exc:
+            raise RuntimeError(f'failed to read lines from input data '
+                               f'file ({input_file_path}): {exc}')
+
+
+def _read_xlsx_data_calamine(params: dict) -> Iterator[List]:
+    """
+    Read the rows of data in the Excel spreadsheet defined in params using
+    python-calamine.
+
+    Notes:
+        calamine parses the sheet in native code without creating a python
+        object per cell.  Python values are only created for the cells in
+        the columns that will be written.
+
+        calamine returns numbers as floats and plain dates as dates, they
+        are converted back to what openpyxl returns so the output is the
+        same whichever reader is used.
+
+    :param params:
+        Collection of runtime parameters provided by the caller that have
+        been verified and translated to a dictionary.
+    :return:
+        The header row of the input data file in full, followed by the data
+        rows holding just the output columns in output order.  Rows are
+        yielded one at a time in the order that they appear in the original
+        data file.
+    :raise RuntimeError:
+        If there is a problem opening or reading the input file specified
+        in params as an Excel spreadsheet this exception will be raised.
+    """
+    input_file_path = params['input_file_path']
+    sheet_name = params['input_sheet_name']
+    import python_calamine
+
+    try:
+        workbook = python_calamine.CalamineWorkbook.from_path(input_file_path)
+    except (OSError, python_calamine.CalamineError) as exc:
+        raise RuntimeError(f'failed to read lines from input data file '
+                           f'({input_file_path}): {exc}')
+
+    with workbook:
+        try:
+            sheet = workbook.get_sheet_by_name(sheet_name)
+        except python_calamine.WorksheetNotFound:
+            raise RuntimeError(f'no sheet named ({sheet_name}) is contained '
+                               f'in input data file ({input_file_path})')
+        except python_calamine.CalamineError as exc:
+            # The sheet's cells are read here, a bad one fails the read.
+            raise RuntimeError(f'failed to read lines from input data file '
+                               f'({input_file_path}): {exc}')
+        # Rows start at the first row of the sheet but the columns start at
+        # the first column that has data.
+        start_col = sheet.start[1] if sheet.start is not None else 0
+
+        output_indexes = None
+        for values in sheet.iter_rows():
+            if output_indexes is None:
+                row = [''] * start_col
+                row.extend(_calamine_value_to_str(value) for value in values)
+                yield row
+
+                output_indexes = _find_output_indexes(row, params)
+                continue
+
+            row = []
+            for col_index in output_indexes:
+                value_index = col_index - start_col
+                if 0 <= value_index < len(values):
+                    row.append(_calamine_value_to_str(values[value_index]))
+                else:
+                    row.append('')
+            yield row
+
+
+def _read_xlsx_data_openpyxl(params: dict) -> Iterator[List]:
+    """
+    Read the rows of data in the Excel spreadsheet defined in params using
+    openpyxl.
+
+    Notes:
+        Only used when the sheet can't be located in the xlsx archive by
+        _read_xlsx_data.  openpyxl creates an object for every cell in the
+        sheet so this is a lot slower.
+
+        Values are converted to strings the same way csv.writer would.
+
     :param params:
         Collection of runtime parameters provided by the caller that have
         been verified and translated to a dictionary.
     :return:
-        A list of the data rows in the input data file in the order that
-        they appear in the original data file.
+        The header row of the input data file in full, followed by the data
+        rows holding just the output columns in output order.  Rows are
+        yielded one at a time in the order that they appear in the original
+        data file.
     :raise RuntimeError:
         If there is a problem opening or reading the input file specified
         in params as an Excel spreadsheet this exception will be raised.
     """
-    data_rows = []
+    import openpyxl
+
+    input_file_path = params['input_file_path']
+    sheet_name = params['input_sheet_name']
     try:
-        wb = openpyxl.load_workbook(params['input_file_path'],
+        wb = openpyxl.load_workbook(input_file_path,
                                     read_only=True,
                                     data_only=True)
-        if params['input_sheet_name'] not in wb.sheetnames:
-            raise RuntimeError(f'no sheet named '
-                               f'({params["input_sheet_name"]}) is contained '
-                               f'in input data file '
-                               f'({params["input_file_path"]})')
-        ws = wb[params['input_sheet_name']]
-
-        for row in ws.values:
-            data_rows.append(list(row))
-    except IOError as ioe:
+    except OSError as exc:
+        raise RuntimeError(f'failed to read lines from input data file '
+                           f'({input_file_path}): {exc}')
+    try:
+        ws = wb[sheet_name]
+    except KeyError:
+        raise RuntimeError(f'no sheet named ({sheet_name}) is contained in '
+                           f'input data file ({input_file_path})')
+
+    output_indexes = None
+    for values in ws.values:
+        if output_indexes is not None:
+            values = [values[index] for index in output_indexes]
+        row = ['' if value is None else str(value) for value in values]
+        yield row
+        if output_indexes is None:
+            output_indexes = _find_output_indexes(row, params)
+
+
+def _shuffle_csv_bytes(params: dict) -> bool:
+    """
+    Copy the output columns from the CSV data file to the output file
+    without decoding the data rows.
+
+    Notes:
+        This is a faster path for simple CSV data, turned on with
+        data_files.csv_byte_scan.  The input is memory mapped and split on
+        newlines and commas as bytes, so no string is created for the
+        columns that are dropped.  That is only right when no value is
+        quoted, lines end in \n or \r\n and no line is empty, so the whole
+        input is checked for quote characters, lone carriage returns and
+        empty lines first.  The encoding must be one where ',' and newline
+        are always single bytes.  Invalid bytes in the data rows are copied
+        through untouched rather than handled with
+        character_encoding_errors.
+
+    :param params:
+        Collection of runtime parameters provided by the caller that have
+        been verified and translated to a dictionary.
+    :return:
+        True if the output file was written, False if the input can't be
+        handled this way and the normal CSV reader should be used.
+    :raise RuntimeError:
+        If there is a problem opening the input or output file or the
+        output columns can't be determined.
+    """
+    input_file_path = params['input_file_path']
+    output_file_path = params['output_file_path']
+    encoding = params['character_encoding']
+    encoding_errors = params['character_encoding_errors']
+    if codecs.lookup(encoding).name not in ('utf-8', 'ascii'):
+        return False
+
+    try:
+        in_fh = open(input_file_path, 'rb')
+    except OSError as exc:
         raise RuntimeError(f'failed to read lines from input data file '
-                           f'({params["input_file_path"]}): {ioe}')
+                           f'({input_file_path}): {exc}')
+
+    with in_fh:
+        # An empty file can't be mapped, the normal reader reports it.
+        if os.fstat(in_fh.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(in_fh.fileno(), 0, access=mmap.ACCESS_READ) as in_map:
+            if ((in_map.find(b'"') != -1) or
+                    (re.search(rb'\r(?!\n)', in_map) is not None) or
+                    (in_map[:1] == b'\n') or
+                    (in_map[:2] == b'\r\n') or
+                    (re.search(rb'\n\r?\n', in_map) is not None)):
+                return False
+
+            header_line = in_map.readline().rstrip(b'\r\n')
+            in_headers = header_line.decode(encoding,
+                                            encoding_errors).split(',')
+            output_indexes, out_headers = _find_output_columns(in_headers,
+                                                               params)
+            project = _make_projector(output_indexes)
 
-    return data_rows
+            # The headers may come from the configuration and need quoting.
+            header_text = io.StringIO(newline='')
+            csv.writer(header_text,
+                       delimiter=',',
+                       quotechar='"').writerow(out_headers)
+
+            try:
+                out_fh = open(output_file_path,
+                              'wb',
+                              buffering=IO_BUFFER_SIZE)
+            except OSError as exc:
+                raise RuntimeError(f'failed to write lines to OUT_PATH '
+                                   f'({output_file_path}): {exc}')
+
+            with out_fh:
+                out_fh.write(header_text.getvalue().encode(encoding,
+                                                           encoding_errors))
+                remainder = b''
+                while True:
+                    block = in_map.read(IO_BUFFER_SIZE)
+                    if block:
+                        lines = (remainder + block).split(b'\n')
+                        remainder = lines.pop()
+                    elif remainder:
+                        lines = [remainder]
+                    else:
+                        break
+                    if not lines:
+                        continue
+                    # A row that is a single empty value is quoted, like
+                    # csv.writer does, so it isn't written as a blank line.
+                    out_fh.write(b'\r\n'.join([
+                        b','.join(project(line.rstrip(b'\r').split(b',')))
+                        or b'""'
+                        for line in lines]))
+                    out_fh.write(b'\r\n')
+                    if not block:
+                        break
+    return True
 
 
-def _validate_config(config_raw: configparser.ConfigParser) -> \
+def _stat_or_none(path: str) -> Union[os.stat_result, None]:
+    """
+    Get the status of path with a single stat call.
+
+    :param path:
+        The file or directory to check.
+    :return:
+        The result of os.stat or None if path doesn't exist or can't be
+        checked.
+    """
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _validate_config(config_raw: Dict[str, Dict[str, str]]) -> \
         Tuple[bool, Union[str, None], Dict]:
     """
-    Check config_parser for the parameters needed to operate this script.
+    Check config_raw for the parameters needed to operate this script.
 
     :param config_raw:
         The raw configuration data provided to this run of the script.
     :return:
         A tuple containing the following elements:
-            0 - flag to indicate if config_parser contains the expected
+            0 - flag to indicate if config_raw contains the expected
                 parameters and that they are valid
-            1 - string describing issues that indicate that config_parser
+            1 - string describing issues that indicate that config_raw
                 is not valid for running this script
             2 - Dictionary containing the parameters needed to run this
                 script.  Some parameters may be defined even if the overall
@@ -247,12 +1192,15 @@ def _validate_config(config_raw: configparser.ConfigParser) -> \
     invalid = []
     config_map = {}
 
-    if not config_raw.has_section('data_files'):
+    if 'data_files' not in config_raw:
         invalid.append('data_files section not defined')
     else:
-        if config_raw.has_option('data_files', 'input_path'):
-            input_path = config_raw.get('data_files', 'input_path')
-            if not (os.path.isdir(input_path)
+        data_files = config_raw['data_files']
+        if 'input_path' in data_files:
+            input_path = data_files['input_path']
+            input_path_stat = _stat_or_none(input_path)
+            if not ((input_path_stat is not None)
+                    and stat.S_ISDIR(input_path_stat.st_mode)
                     and os.access(input_path, os.R_OK)):
                 invalid.append(
                     'data_files.input_path is not a readable directory')
@@ -260,15 +1208,14 @@ def _validate_config(config_raw: configparser.ConfigParser) -> \
             input_path = None
             invalid.append('data_files.input_path not defined')
 
-        if config_raw.has_option('data_files', 'input_file_name'):
-            input_file_name = config_raw.get('data_files', 'input_file_name')
+        if 'input_file_name' in data_files:
+            input_file_name = data_files['input_file_name']
         else:
             input_file_name = None
             invalid.append('data_files.input_file_name not defined')
 
-        if config_raw.has_option('data_files', 'input_file_extension'):
-            input_file_extension = config_raw.get('data_files',
-                                                  'input_file_extension')
+        if 'input_file_extension' in data_files:
+            input_file_extension = data_files['input_file_extension']
             config_map['input_data_type'] = input_file_extension
         else:
             input_file_extension = None
@@ -280,23 +1227,26 @@ def _validate_config(config_raw: configparser.ConfigParser) -> \
             input_file_path = os.path.join(os.path.abspath(input_path),
                                            f'{input_file_name}.'
                                            f'{input_file_extension}')
-            if not (os.path.isfile(input_file_path)
+            input_file_stat = _stat_or_none(input_file_path)
+            if not ((input_file_stat is not None)
+                    and stat.S_ISREG(input_file_stat.st_mode)
                     and os.access(input_file_path, os.R_OK)):
                 invalid.append(f'input_file_path ({input_file_path} is not '
                                f'a readable file')
             else:
                 config_map['input_file_path'] = input_file_path
 
-        if config_raw.has_option('data_files', 'input_sheet_name'):
-            config_map['input_sheet_name'] = config_raw.get('data_files',
-                                                            'input_sheet_name')
+        if 'input_sheet_name' in data_files:
+            config_map['input_sheet_name'] = data_files['input_sheet_name']
         elif input_file_extension == 'xlsx':
             invalid.append('data_files.input_sheet_name must be defined '
                            'when data_files.input_file_extension is xlsx')
 
-        if config_raw.has_option('data_files', 'output_path'):
-            output_path = config_raw.get('data_files', 'output_path')
-            if not (os.path.isdir(output_path)
+        if 'output_path' in data_files:
+            output_path = data_files['output_path']
+            output_path_stat = _stat_or_none(output_path)
+            if not ((output_path_stat is not None)
+                    and stat.S_ISDIR(output_path_stat.st_mode)
                     and os.access(output_path, os.W_OK)):
                 invalid.append(
                     'data_files.output_path is not a writeable directory')
@@ -304,15 +1254,14 @@ def _validate_config(config_raw: configparser.ConfigParser) -> \
             output_path = None
             invalid.append('data_files.output_path not defined')
 
-        if config_raw.has_option('data_files', 'output_file_name'):
-            output_file_name = config_raw.get('data_files', 'output_file_name')
+        if 'output_file_name' in data_files:
+            output_file_name = data_files['output_file_name']
         else:
             output_file_name = None
             invalid.append('data_files.output_file_name not defined')
 
-        if config_raw.has_option('data_files', 'output_file_extension'):
-            output_file_extension = config_raw.get('data_files',
-                                                   'output_file_extension')
+        if 'output_file_extension' in data_files:
+            output_file_extension = data_files['output_file_extension']
         else:
             output_file_extension = None
             invalid.append('data_files.output_file_extension not defined')
@@ -324,39 +1273,50 @@ def _validate_config(config_raw: configparser.ConfigParser) -> \
                 os.path.abspath(output_path),
                 f'{output_file_name}.{output_file_extension}')
 
-        if config_raw.has_option('data_files', 'character_encoding'):
-            config_map['character_encoding'] = config_raw.get(
-                'data_files',
-                'character_encoding')
+        if 'character_encoding' in data_files:
+            config_map['character_encoding'] = \
+                data_files['character_encoding']
         else:
             config_map['character_encoding'] = DEFAULT_CHARACTER_ENCODING
 
-        if config_raw.has_option('data_files', 'character_encoding_errors'):
-            config_map['character_encoding_errors'] = config_raw.get(
-                'data_files',
-                'character_encoding_errors')
+        if 'character_encoding_errors' in data_files:
+            config_map['character_encoding_errors'] = \
+                data_files['character_encoding_errors']
         else:
             config_map['character_encoding_errors'] = DEFAULT_ENCODING_ERRORS
 
-    if not config_raw.has_section('data_columns'):
+        if 'csv_byte_scan' in data_files:
+            byte_scan = data_files['csv_byte_scan'].lower()
+            if byte_scan in ('1', 'yes', 'true', 'on'):
+                config_map['csv_byte_scan'] = True
+            elif byte_scan in ('0', 'no', 'false', 'off'):
+                config_map['csv_byte_scan'] = False
+            else:
+                invalid.append('data_files.csv_byte_scan must be true or '
+                               'false')
+        else:
+            config_map['csv_byte_scan'] = False
+
+    if 'data_columns' not in config_raw:
         invalid.append('data_columns section not defined')
     else:
+        data_columns = config_raw['data_columns']
         columns_defined = False
 
-        if config_raw.has_option('data_columns', 'column_headers'):
-            headers = config_raw.get('data_columns', 'column_headers')
+        if 'column_headers' in data_columns:
+            headers = data_columns['column_headers']
             config_map['column_headers'] = [col.strip()
                                             for col in headers.splitlines()]
             columns_defined = True
 
-        if config_raw.has_option('data_columns', 'column_letters'):
-            letters = config_raw.get('data_columns', 'column_letters')
+        if 'column_letters' in data_columns:
+            letters = data_columns['column_letters']
             config_map['column_letters'] = [col.strip()
                                             for col in letters.splitlines()]
             columns_defined = True
 
-        if config_raw.has_option('data_columns', 'column_indexes'):
-            indexes = config_raw.get('data_columns', 'column_indexes')
+        if 'column_indexes' in data_columns:
+            indexes = data_columns['column_indexes']
             config_map['column_indexes'] = [int(col.strip())
                                             for col in indexes.splitlines()]
             columns_defined = True
@@ -365,6 +1325,11 @@ def _validate_config(config_raw: configparser.ConfigParser) -> \
             invalid.append('one of column headers, letters, or indexes must'
                            'be defined')
 
+        if 'output_headers' in data_columns:
+            headers = data_columns['output_headers']
+            config_map['output_headers'] = [col.strip()
+                                            for col in headers.splitlines()]
+
     if len(invalid) > 0:
         valid = False
         invalid_str = (f'one or more invalid configuration parameters '
@@ -376,52 +1341,132 @@ def _validate_config(config_raw: configparser.ConfigParser) -> \
     return valid, invalid_str, config_map
 
 
+def _write_csv_rows(out_fh: TextIO,
+                    csv_writer: Any,
+                    rows: Iterable[Sequence[str]],
+                    field_count: int) -> None:
+    """
+    Write rows of string values to a CSV file.
+
+    Notes:
+        Rows are written in chunks of WRITE_CHUNK_ROWS.  Most chunks don't
+        have any values that need to be quoted.  Those are joined and
+        written straight to out_fh with a single write, which is quicker
+        than going through csv.writer a row at a time.  A chunk with a
+        delimiter, quote, or line break in one of its values is given to
+        csv_writer to quote.
+
+    :param out_fh:
+        The file that csv_writer writes to.
+    :param csv_writer:
+        CSV writer for rows that need quoting.
+    :param rows:
+        The rows to write, every row must have field_count values.
+    :param field_count:
+        The number of values in each row.
+    """
+    rows = iter(rows)
+    # Bound to locals so they aren't looked up again for every chunk.
+    join = ','.join
+    write = out_fh.write
+    writerows = csv_writer.writerows
+    line_terminator = csv_writer.dialect.lineterminator
+    terminator_newlines = line_terminator.count('\n')
+    terminator_returns = line_terminator.count('\r')
+    while True:
+        chunk = list(itertools.islice(rows, WRITE_CHUNK_ROWS))
+        if not chunk:
+            break
+
+        lines = list(map(join, chunk))
+        text = line_terminator.join(lines)
+        line_breaks = len(lines) - 1
+        # A single empty value has to be quoted or it would be a blank line.
+        if ((text.count(',') == len(lines) * (field_count - 1)) and
+                ('"' not in text) and
+                (text.count('\n') == line_breaks * terminator_newlines) and
+                (text.count('\r') == line_breaks * terminator_returns) and
+                ((field_count > 1) or ('' not in lines))):
+            write(text)
+            write(line_terminator)
+        else:
+            writerows(chunk)
+
+
 def main(params: dict) -> None:
     """
     Read the input data file and write the data columns specified in a new
     file.
 
+    Notes:
+        Rows are written as they are read, collected in chunks of
+        WRITE_CHUNK_ROWS, so memory is bounded by one chunk of rows and its
+        joined text rather than the size of the input.
+
     :param params:
         Collection of runtime parameters provided by the caller that have
         been verified and translated to a dictionary.
     :raise RuntimeError:
         Any expected exceptions will be redefined and raised in this form.
+    :raise OSError:
+        If reading or writing fails part way through the data files.
     """
-    if params['input_data_type'].lower() == 'csv':
-        data_rows_in = _read_csv_data(params)
-    elif params['input_data_type'].lower() == 'xlsx':
+    input_data_type = params['input_data_type'].lower()
+    output_file_path = params['output_file_path']
+    encoding = params['character_encoding']
+    encoding_errors = params['character_encoding_errors']
+    if ((input_data_type == 'csv') and
+            params.get('csv_byte_scan', False) and
+            _shuffle_csv_bytes(params)):
+        return
+
+    # The xlsx readers only decode the output columns so their data rows
+    # come back already projected.
+    if input_data_type == 'csv':
+        in_fh, data_rows_in = _open_csv_reader(params)
+        rows_projected = False
+    elif input_data_type == 'xlsx':
         data_rows_in = _read_xlsx_data(params)
+        in_fh = contextlib.closing(data_rows_in)
+        rows_projected = True
     else:
         raise RuntimeError(f'Unknown input data type '
                            f'({params["input_data_type"]}) provided, only '
                            f'recognized types are (csv, xlsx)')
-    if len(data_rows_in) == 0:
-        raise RuntimeError(f'Failed to read any data rows from input data '
-                           f'file ({params["input_file_path"]}')
 
-    valid_indexes, err_indexes, output_indexes = _calculate_output_indexes(
-        in_headers=copy.copy(data_rows_in[0]),
-        params=params)
-    if not valid_indexes:
-        raise RuntimeError(f'failed to translate data_columns to data '
-                           f'index numbers: {err_indexes}')
+    with in_fh:
+        in_headers = next(data_rows_in, None)
+        if in_headers is None:
+            raise RuntimeError(f'Failed to read any data rows from input data '
+                               f'file ({params["input_file_path"]})')
 
-    try:
-        with open(params['output_file_path'],
-                  'w',
-                  encoding=params['character_encoding'],
-                  errors=params['character_encoding_errors']) as out_fh:
+        output_indexes, out_headers = _find_output_columns(in_headers, params)
+        project = _make_projector(output_indexes)
+        if rows_projected:
+            data_rows_out = data_rows_in
+        else:
+            data_rows_out = map(project, data_rows_in)
+
+        try:
+            out_fh = open(output_file_path,
+                          'w',
+                          buffering=IO_BUFFER_SIZE,
+                          encoding=encoding,
+                          errors=encoding_errors,
+                          newline='')
+        except OSError as exc:
+            raise RuntimeError(f'failed to write lines to OUT_PATH '
+                               f'({output_file_path}): {exc}')
+
+        with out_fh:
             csv_writer = csv.writer(out_fh,
                                     delimiter=',',
                                     quotechar='"')
-            for row in data_rows_in:
-                data_row_out = []
-                for index in output_indexes:
-                    data_row_out.append(row[index])
-                csv_writer.writerow(data_row_out)
-    except IOError as ioe:
-        raise RuntimeError(f'failed to write lines to OUT_PATH '
-                           f'({params["output_file_path"]}: {ioe}')
+            csv_writer.writerow(out_headers)
+            _write_csv_rows(out_fh,
+                            csv_writer,
+                            data_rows_out,
+                            len(output_indexes))
 
 
 if __name__ == '__main__':
@@ -433,6 +1478,6 @@ if __name__ == '__main__':
             raise RuntimeError(err_str)
         print(config)
         main(config)
-    except RuntimeError as rte:
-        print(f'shuffle failed: {rte}')
+    except (RuntimeError, OSError) as exc:
+        print(f'shuffle failed: {exc}')
         sys.exit(1)
@@ -0,0 +1,594 @@
+"""
+Regression tests for csv_shuffle.
+
+Run from the top of the repository with:
+    python -m unittest discover -s tests
+"""
+import configparser
+import importlib.util
+import os
+import sys
+import tempfile
+import tracemalloc
+import unittest
+import zipfile
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'src'))
+import csv_shuffle  # noqa: E402
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'content-types">'
+    '<Default Extension="rels" ContentType="application/'
+    'vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '</Types>')
+XLSX_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>')
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/'
+    'main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships">{workbook_pr}'
+    '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>')
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/sharedStrings" '
+    'Target="{strings_target}"/>'
+    '</Relationships>')
+XLSX_SHEET = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/'
+    'main">{dimension}<sheetData>{rows}</sheetData></worksheet>')
+XLSX_SHARED_STRINGS = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/'
+    'main">{items}</sst>')
+# Style 0 is general, style 1 a built in date format, style 2 a custom date
+# format, style 3 the built in elapsed time format and style 4 a custom
+# elapsed time format.
+XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+    '2006/main">'
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy\\-mm\\-dd"/>'
+    '<numFmt numFmtId="165" formatCode="[hh]:mm;@"/></numFmts>'
+    '<cellXfs count="5"><xf numFmtId="0"/><xf numFmtId="14"/>'
+    '<xf numFmtId="164"/><xf numFmtId="46"/><xf numFmtId="165"/></cellXfs>'
+    '</styleSheet>')
+
+
+def _write_xlsx(path: str,
+                rows: str,
+                shared_strings: str = '',
+                dimension: str = '',
+                date1904: bool = False,
+                strings_target: str = 'sharedStrings.xml') -> None:
+    """
+    Write a minimal xlsx archive holding a single sheet named Sheet1.
+
+    :param path:
+        Where the archive is written.
+    :param rows:
+        The <row> elements of the sheet.
+    :param shared_strings:
+        The <si> elements of the shared string table.
+    :param dimension:
+        The ref of the sheet dimension element, left out if empty.
+    :param date1904:
+        Set the workbook to count dates from 1904.
+    :param strings_target:
+        Where the shared strings are stored, relative to xl/ unless it
+        starts with /.
+    """
+    workbook_pr = '<workbookPr date1904="1"/>' if date1904 else ''
+    dimension = f'<dimension ref="{dimension}"/>' if dimension else ''
+    with zipfile.ZipFile(path, 'w') as xlsx_zip:
+        xlsx_zip.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        xlsx_zip.writestr('_rels/.rels', XLSX_PACKAGE_RELS)
+        xlsx_zip.writestr('xl/workbook.xml',
+                          XLSX_WORKBOOK.format(workbook_pr=workbook_pr))
+        xlsx_zip.writestr('xl/_rels/workbook.xml.rels',
+                          XLSX_WORKBOOK_RELS.format(
+                              strings_target=strings_target))
+        xlsx_zip.writestr('xl/styles.xml', XLSX_STYLES)
+        if strings_target.startswith('/'):
+            strings_part = strings_target[1:]
+        else:
+            strings_part = f'xl/{strings_target}'
+        xlsx_zip.writestr(strings_part,
+                          XLSX_SHARED_STRINGS.format(items=shared_strings))
+        xlsx_zip.writestr('xl/worksheets/sheet1.xml',
+                          XLSX_SHEET.format(dimension=dimension, rows=rows))
+
+
+class ReadXlsxDataTest(unittest.TestCase):
+    """
+    The streaming xlsx reader, python-calamine is hidden so it always runs.
+    """
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = os.path.join(temp_dir.name, 'in.xlsx')
+
+        find_spec = importlib.util.find_spec
+
+        def hide_calamine(name, *args, **kwargs):
+            if name == 'python_calamine':
+                return None
+            return find_spec(name, *args, **kwargs)
+
+        patcher = mock.patch('importlib.util.find_spec', hide_calamine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _read(self, **columns) -> list:
+        params = {'input_file_path': self.path,
+                  'input_sheet_name': 'Sheet1'}
+        params.update(columns)
+        return list(csv_shuffle._read_xlsx_data(params))
+
+    def test_shared_and_inline_strings(self):
+        _write_xlsx(
+            self.path,
+            '<row r="1"><c r="A1" t="s"><v>0</v></c>'
+            '<c r="B1" t="inlineStr"><is><t>inline</t></is></c>'
+            '<c r="C1" t="s"><v>1</v></c></row>'
+            '<row r="2"><c r="A2" t="inlineStr"><is><r><t>ri</t></r>'
+            '<r><t>ch</t></r></is></c>'
+            '<c r="B2" t="s"><v>2</v></c><c r="C2"><v>7</v></c></row>',
+            shared_strings='<si><t>shared</t></si>'
+                           '<si><r><t>two </t></r><r><t>runs</t></r></si>'
+                           '<si><t>again</t></si>')
+        self.assertEqual(self._read(column_indexes=[2, 0, 1]),
+                         [['shared', 'inline', 'two runs'],
+                          ['7', 'rich', 'again']])
+
+    def test_shared_strings_part_from_relationships(self):
+        for strings_target in ('strings/table.xml', '/xl/other.xml'):
+            with self.subTest(strings_target=strings_target):
+                _write_xlsx(self.path,
+                            '<row r="1"><c r="A1" t="s"><v>1</v></c></row>',
+                            shared_strings='<si><t>x</t></si><si><t>y</t>'
+                                           '</si>',
+                            strings_target=strings_target)
+                self.assertEqual(self._read(column_indexes=[0]), [['y']])
+
+    def test_sparse_rows_and_cells_without_reference(self):
+        _write_xlsx(
+            self.path,
+            '<row r="1"><c t="inlineStr"><is><t>a</t></is></c>'
+            '<c t="inlineStr"><is><t>b</t></is></c>'
+            '<c t="inlineStr"><is><t>c</t></is></c></row>'
+            '<row r="3"><c r="C3"><v>3</v></c></row>'
+            '<row><c><v>1</v></c><c><v>2</v></c></row>'
+            '<row r="6"><c r="B6"><v>5</v></c><c><v>6</v></c></row>',
+            dimension='A1:C6')
+        self.assertEqual(self._read(column_letters=['C', 'A']),
+                         [['a', 'b', 'c'],
+                          ['', ''],
+                          ['3', ''],
+                          ['', '1'],
+                          ['', ''],
+                          ['6', '']])
+
+    def test_header_padded_to_dimension(self):
+        _write_xlsx(
+            self.path,
+            '<row r="2"><c r="B2" t="inlineStr"><is><t>b</t></is></c></row>'
+            '<row r="3"><c r="B3"><v>1</v></c><c r="D3"><v>2</v></c></row>',
+            dimension='B2:D3')
+        self.assertEqual(self._read(column_headers=['b']),
+                         [['', '', '', ''], ['', 'b', '', ''], ['1']])
+
+    def test_formula_without_cached_value(self):
+        _write_xlsx(
+            self.path,
+            '<row r="1"><c r="A1" t="inlineStr"><is><t>a</t></is></c>'
+            '<c r="B1" t="inlineStr"><is><t>b</t></is></c></row>'
+            '<row r="2"><c r="A2"><v>1</v></c>'
+            '<c r="B2"><f>A2*2</f><v /></c></row>'
+            '<row r="3"><c r="A3" t="str"><f>"x"</f><v></v></c>'
+            '<c r="B3"><f>A3</f></c></row>')
+        self.assertEqual(self._read(column_indexes=[0, 1]),
+                         [['a', 'b'], ['1', ''], ['', '']])
+
+    def test_date_styles(self):
+        _write_xlsx(
+            self.path,
+            '<row r="1"><c r="A1" t="inlineStr"><is><t>d</t></is></c></row>'
+            '<row r="2"><c r="A2" s="1"><v>45000</v></c></row>'
+            '<row r="3"><c r="A3" s="2"><v>45000.5</v></c></row>'
+            '<row r="4"><c r="A4" s="1"><v>0.25</v></c></row>'
+            '<row r="5"><c r="A5" s="1"><v>59</v></c></row>'
+            '<row r="6"><c r="A6"><v>45000</v></c></row>'
+            '<row r="7"><c r="A7" s="3"><v>1.5</v></c></row>'
+            '<row r="8"><c r="A8" s="4"><v>1.25</v></c></row>'
+            '<row r="9"><c r="A9" s="3"><v>0.5</v></c></row>'
+            '<row r="10"><c r="A10" s="4"><v>2</v></c></row>')
+        self.assertEqual(self._read(column_indexes=[0]),
+                         [['d'],
+                          ['2023-03-15 00:00:00'],
+                          ['2023-03-15 12:00:00'],
+                          ['06:00:00'],
+                          ['1900-02-28 00:00:00'],
+                          ['45000'],
+                          ['1 day, 12:00:00'],
+                          ['1 day, 6:00:00'],
+                          ['12:00:00'],
+                          ['2 days, 0:00:00']])
+
+    def test_1904_epoch(self):
+        _write_xlsx(
+            self.path,
+            '<row r="1"><c r="A1" t="inlineStr"><is><t>d</t></is></c></row>'
+            '<row r="2"><c r="A2" s="1"><v>43538</v></c></row>'
+            '<row r="3"><c r="A3" s="1"><v>14</v></c></row>',
+            date1904=True)
+        self.assertEqual(self._read(column_indexes=[0]),
+                         [['d'],
+                          ['2023-03-15 00:00:00'],
+                          ['1904-01-15 00:00:00']])
+
+    def test_bad_cell_reference(self):
+        _write_xlsx(
+            self.path,
+            '<row r="1"><c r="A1"><v>1</v></c></row>'
+            '<row r="2"><c r="A$2"><v>2</v></c></row>')
+        with self.assertRaisesRegex(RuntimeError, 'failed to read lines'):
+            self._read(column_indexes=[0])
+
+    def test_shared_string_index_out_of_range(self):
+        _write_xlsx(self.path,
+                    '<row r="1"><c r="A1" t="s"><v>1</v></c></row>',
+                    shared_strings='<si><t>only</t></si>')
+        with self.assertRaisesRegex(RuntimeError, 'failed to read lines'):
+            self._read(column_indexes=[0])
+
+    def test_malformed_sheet(self):
+        _write_xlsx(self.path, '<row r="1"><c r="A1"><v>1</v></c>')
+        with self.assertRaisesRegex(RuntimeError, 'failed to read lines'):
+            self._read(column_indexes=[0])
+
+    def test_malformed_shared_strings(self):
+        _write_xlsx(self.path,
+                    '<row r="1"><c r="A1" t="s"><v>0</v></c></row>',
+                    shared_strings='<si><t>open')
+        with self.assertRaisesRegex(RuntimeError, 'failed to read lines'):
+            self._read(column_indexes=[0])
+
+    def _peak_memory(self, row_count: int) -> int:
+        _write_xlsx(self.path,
+                    ''.join(f'<row r="{row_num}"><c r="A{row_num}"><v>1</v>'
+                            f'</c><c r="B{row_num}"><v>2</v></c></row>'
+                            for row_num in range(1, row_count + 1)))
+        tracemalloc.start()
+        try:
+            for _ in csv_shuffle._read_xlsx_data({
+                    'input_file_path': self.path,
+                    'input_sheet_name': 'Sheet1',
+                    'column_indexes': [1]}):
+                pass
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_does_not_grow_with_rows(self):
+        small_peak = self._peak_memory(20000)
+        large_peak = self._peak_memory(80000)
+        self.assertLess(large_peak, small_peak * 1.5)
+
+
+@unittest.skipIf(importlib.util.find_spec('python_calamine') is None,
+                 'python-calamine is not installed')
+class ReadXlsxDataCalamineTest(unittest.TestCase):
+    """
+    python-calamine gives the same values as the streaming xlsx reader.
+    """
+
+    def test_matches_streaming_reader(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        path = os.path.join(temp_dir.name, 'in.xlsx')
+        params = {'input_file_path': path,
+                  'input_sheet_name': 'Sheet1',
+                  'column_indexes': [0, 1, 2, 3]}
+        for date1904 in (False, True):
+            _write_xlsx(
+                path,
+                '<row r="1"><c r="A1"><v>-2E+20</v></c>'
+                '<c r="B1"><v>1E+16</v></c>'
+                '<c r="C1"><v>9999999999999998</v></c>'
+                '<c r="D1"><v>2.5</v></c></row>'
+                '<row r="2"><c r="A2" s="1"><v>14</v></c>'
+                '<c r="B2" s="2"><v>45000.5</v></c>'
+                '<c r="C2" s="1"><v>0.75</v></c>'
+                '<c r="D2"><v>-3</v></c></row>'
+                '<row r="3"><c r="A3" s="3"><v>1.5</v></c>'
+                '<c r="B3" s="4"><v>1.25</v></c>'
+                '<c r="C3" s="3"><v>0.5</v></c></row>',
+                date1904=date1904)
+            with mock.patch('importlib.util.find_spec', return_value=None):
+                streamed = list(csv_shuffle._read_xlsx_data(params))
+            self.assertEqual(
+                list(csv_shuffle._read_xlsx_data_calamine(params)), streamed)
+
+    def test_bad_shared_string_index(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        path = os.path.join(temp_dir.name, 'in.xlsx')
+        _write_xlsx(path,
+                    '<row r="1"><c r="A1" t="s"><v>1</v></c></row>',
+                    shared_strings='<si><t>only</t></si>')
+        with self.assertRaisesRegex(RuntimeError, 'failed to read lines'):
+            list(csv_shuffle._read_xlsx_data_calamine({
+                'input_file_path': path,
+                'input_sheet_name': 'Sheet1',
+                'column_indexes': [0]}))
+
+    def test_sheet_not_starting_at_a1(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        path = os.path.join(temp_dir.name, 'in.xlsx')
+        _write_xlsx(
+            path,
+            '<row r="2"><c r="B2" t="inlineStr"><is><t>b</t></is></c>'
+            '<c r="D2" t="inlineStr"><is><t>d</t></is></c></row>'
+            '<row r="3"><c r="C3"><v>3</v></c><c r="D3"><v>4</v></c></row>'
+            '<row r="4"><c r="B4"><v>5</v></c></row>',
+            dimension='B2:D4')
+        for columns in ({'column_indexes': [3, 0, 1, 2]},
+                        {'column_letters': ['D', 'B']}):
+            with self.subTest(columns=columns):
+                params = {'input_file_path': path,
+                          'input_sheet_name': 'Sheet1'}
+                params.update(columns)
+                with mock.patch('importlib.util.find_spec',
+                                return_value=None):
+                    streamed = list(csv_shuffle._read_xlsx_data(params))
+                self.assertEqual(
+                    list(csv_shuffle._read_xlsx_data_calamine(params)),
+                    streamed)
+
+
+class ParseIniTest(unittest.TestCase):
+    """
+    _parse_ini gives the same sections and options as configparser.
+    """
+
+    def _assert_matches_configparser(self, config_text: str) -> None:
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.read_string(config_text)
+        expected = {name: dict(parser[name]) for name in parser.sections()}
+
+        parsed, err_parse, sections = csv_shuffle._parse_ini(config_text)
+        self.assertTrue(parsed, err_parse)
+        self.assertEqual(sections, expected)
+
+    def test_example_configuration(self):
+        ini_path = os.path.join(os.path.dirname(csv_shuffle.__file__),
+                                'csv_shuffle.ini')
+        with open(ini_path, encoding='utf-8') as ini_fh:
+            self._assert_matches_configparser(ini_fh.read())
+
+    def test_continuation_lines(self):
+        self._assert_matches_configparser(
+            '[data_columns]\n'
+            'Column_Headers = first\n'
+            '    second\n'
+            '# a comment inside the value\n'
+            '\n'
+            '    third\n'
+            '\n'
+            'column_letters: A\n'
+            '  B = C\n'
+            '[data_files]\n'
+            '; another comment\n'
+            '  input_path = /tmp/%(name)s\n'
+            'empty =\n')
+
+    def test_errors(self):
+        for config_text in ('option = outside\n',
+                            '[a]\nno value here\n',
+                            '[a]\nx = 1\n[a]\n',
+                            '[a]\nx = 1\nX = 2\n'):
+            with self.assertRaises(configparser.Error):
+                configparser.ConfigParser().read_string(config_text)
+            self.assertFalse(csv_shuffle._parse_ini(config_text)[0])
+
+
+class ReadConfigTest(unittest.TestCase):
+    """
+    Valid configurations are cached until the file changes.
+    """
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+        with open(os.path.join(self.temp_dir, 'in.csv'), 'w') as in_fh:
+            in_fh.write('a,b\n')
+        self.config_path = os.path.join(self.temp_dir, 'test.ini')
+
+        patcher = mock.patch.dict(csv_shuffle._CONFIG_CACHE, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write_config(self, columns: str) -> None:
+        with open(self.config_path, 'w') as config_fh:
+            config_fh.write(f'[data_files]\n'
+                            f'input_path = {self.temp_dir}\n'
+                            f'input_file_name = in\n'
+                            f'input_file_extension = csv\n'
+                            f'output_path = {self.temp_dir}\n'
+                            f'output_file_name = out\n'
+                            f'output_file_extension = csv\n'
+                            f'[data_columns]\n'
+                            f'{columns}\n')
+
+    def test_cached_until_changed(self):
+        self._write_config('column_indexes = 1')
+        first = csv_shuffle._read_config(self.config_path)
+        self.assertTrue(first[0], first[1])
+        self.assertIs(csv_shuffle._read_config(self.config_path), first)
+
+        # Same size, new modification time.
+        config_stat = os.stat(self.config_path)
+        os.utime(self.config_path,
+                 ns=(config_stat.st_atime_ns,
+                     config_stat.st_mtime_ns + 1000000000))
+        second = csv_shuffle._read_config(self.config_path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second, first)
+
+        # Same modification time, new size.
+        self._write_config('column_indexes = 0\n                 1')
+        os.utime(self.config_path,
+                 ns=(config_stat.st_atime_ns,
+                     config_stat.st_mtime_ns + 1000000000))
+        third = csv_shuffle._read_config(self.config_path)
+        self.assertTrue(third[0], third[1])
+        self.assertEqual(third[2]['column_indexes'], [0, 1])
+
+    def test_invalid_not_cached(self):
+        self._write_config('')
+        first = csv_shuffle._read_config(self.config_path)
+        self.assertFalse(first[0])
+        self.assertEqual(csv_shuffle._CONFIG_CACHE, {})
+        second = csv_shuffle._read_config(self.config_path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second, first)
+
+
+class OutputHeadersTest(unittest.TestCase):
+    """
+    output_headers replaces the header row written by the csv reader path.
+    """
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.in_path = os.path.join(temp_dir.name, 'in.csv')
+        self.out_path = os.path.join(temp_dir.name, 'out.csv')
+        with open(self.in_path, 'w', newline='') as in_fh:
+            in_fh.write('a,b,c\r\n1,2,3\r\n')
+        self.params = {'input_data_type': 'csv',
+                       'input_file_path': self.in_path,
+                       'output_file_path': self.out_path,
+                       'character_encoding': 'utf-8',
+                       'character_encoding_errors': 'backslashreplace',
+                       'csv_byte_scan': False,
+                       'column_headers': ['c', 'a']}
+
+    def test_override(self):
+        self.params['output_headers'] = ['third, last', 'first']
+        csv_shuffle.main(self.params)
+        with open(self.out_path, newline='') as out_fh:
+            self.assertEqual(out_fh.read(),
+                             '"third, last",first\r\n3,1\r\n')
+
+    def test_count_mismatch(self):
+        self.params['output_headers'] = ['only one']
+        with self.assertRaisesRegex(RuntimeError,
+                                    '1 output_headers defined for 2 output '
+                                    'columns'):
+            csv_shuffle.main(self.params)
+        self.assertFalse(os.path.exists(self.out_path))
+
+
+class CsvByteScanTest(unittest.TestCase):
+    """
+    The byte level CSV scan writes the same output as the csv reader.
+    """
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+        self.in_path = os.path.join(self.temp_dir, 'in.csv')
+
+    def _params(self, data: bytes, byte_scan: bool, **columns) -> dict:
+        with open(self.in_path, 'wb') as in_fh:
+            in_fh.write(data)
+        params = {'input_data_type': 'csv',
+                  'input_file_path': self.in_path,
+                  'output_file_path': os.path.join(self.temp_dir,
+                                                   f'out-{byte_scan}.csv'),
+                  'character_encoding': 'utf-8',
+                  'character_encoding_errors': 'backslashreplace',
+                  'csv_byte_scan': byte_scan}
+        params.update(columns)
+        return params
+
+    def _shuffle(self, data: bytes, byte_scan: bool, **columns) -> bytes:
+        params = self._params(data, byte_scan, **columns)
+        csv_shuffle.main(params)
+        with open(params['output_file_path'], 'rb') as out_fh:
+            return out_fh.read()
+
+    def _assert_same_output(self, data: bytes, **columns) -> None:
+        self.assertEqual(self._shuffle(data, True, **columns),
+                         self._shuffle(data, False, **columns))
+
+    def test_line_endings(self):
+        for data in (b'a,b,c\n1,2,3\n4,5,6\n',
+                     b'a,b,c\r\n1,2,3\r\n4,5,6\r\n',
+                     b'a,b,c\n1,2,3\n4,5,6',
+                     b'a,b,c\r1,2,3\r4,5,6\r',
+                     b'a,b,c\n1,2,3\r4,5,6\n'):
+            with self.subTest(data=data):
+                self._assert_same_output(data, column_indexes=[2, 0])
+
+    def test_empty_lines(self):
+        for data in (b'a,b\n1,2\n\n',
+                     b'a,b\r\n\r\n1,2\r\n',
+                     b'a,b\n1,2\n\r\n3,4\n',
+                     b'\na,b\n1,2\n',
+                     b'\r\na,b\r\n1,2\r\n'):
+            with self.subTest(data=data):
+                params = self._params(data, True, column_indexes=[0])
+                self.assertFalse(csv_shuffle._shuffle_csv_bytes(params))
+                self.assertFalse(os.path.exists(params['output_file_path']))
+
+    def test_values(self):
+        self._assert_same_output(b'a,b,c\n1,,3\n,,\n4,5,6\n',
+                                 column_indexes=[1])
+        self._assert_same_output(b'a,b,c\n"1,x",2,3\n',
+                                 column_indexes=[0, 2])
+        self._assert_same_output('h\u00e9,b\n\u00e9,2\n'.encode(),
+                                 column_headers=['b', 'h\u00e9'])
+        self._assert_same_output(b'a,b,c\n',
+                                 column_indexes=[1, 1])
+
+    def test_output_headers_quoted(self):
+        self._assert_same_output(b'a,b\n1,2\n',
+                                 column_indexes=[1, 0],
+                                 output_headers=['first, second', 'x'])
+
+    def test_large_file_crosses_blocks(self):
+        data = b'a,b,c\r\n' + b''.join(
+            b'%d,%d,%d\r\n' % (row, row * 2, row * 3)
+            for row in range(200000))
+        self.assertGreater(len(data), csv_shuffle.IO_BUFFER_SIZE)
+        self._assert_same_output(data, column_indexes=[2, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()